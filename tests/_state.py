@@ -0,0 +1,100 @@
+"""
+Tracked activities state shared by the test fixtures and benchmarks
+
+Kept out of conftest.py so every module imports the same journal.
+"""
+
+import copy
+import json
+from pathlib import Path
+
+from src.app import activities
+
+
+# Initial activity data, loaded once at import time
+PRISTINE = json.loads((Path(__file__).parent / "fixtures" / "activities.json").read_text())
+
+# The app's own seed data, saved before load_pristine replaces it
+APP_SEED = copy.deepcopy(activities)
+
+
+# Activity dicts and participant lists changed during the current test,
+# keyed by id, with their contents from before the first change
+_journal = {}
+
+# Activity dicts installed by load_pristine, to detect replaced activities
+_installed = {}
+
+
+class TrackedList(list):
+    """List that records its contents in the journal before the first change"""
+
+    def _record(self):
+        if id(self) not in _journal:
+            _journal[id(self)] = (self, list(self))
+
+    def _restore(self, original):
+        list.__setitem__(self, slice(None), original)
+
+
+class TrackedDict(dict):
+    """Dict that records its contents in the journal before the first change"""
+
+    def _record(self):
+        if id(self) not in _journal:
+            _journal[id(self)] = (self, dict(self))
+
+    def _restore(self, original):
+        dict.clear(self)
+        dict.update(self, original)
+
+
+def _tracked(cls, name):
+    method = getattr(cls.__base__, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._record()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort",
+              "reverse", "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(TrackedList, _name, _tracked(TrackedList, _name))
+
+for _name in ("__setitem__", "__delitem__", "__ior__", "pop", "popitem",
+              "clear", "update", "setdefault"):
+    setattr(TrackedDict, _name, _tracked(TrackedDict, _name))
+
+
+def load_pristine():
+    """Fill activities from PRISTINE with tracked activity dicts and lists"""
+    activities.clear()
+    activities.update({
+        name: TrackedDict(details, participants=TrackedList(details["participants"]))
+        for name, details in PRISTINE.items()
+    })
+    _installed.clear()
+    _installed.update(activities)
+
+
+def rollback():
+    """Restore activity dicts and participant lists changed since the last rollback
+
+    Returns whether anything was restored.
+    """
+    changed = bool(_journal)
+    for tracked, original in _journal.values():
+        tracked._restore(original)
+    _journal.clear()
+
+    # The app never adds, removes or replaces activities, but fall back to a
+    # full reload if a test did so
+    if activities.keys() != _installed.keys() or any(
+        activities[name] is not details for name, details in _installed.items()
+    ):
+        load_pristine()
+        changed = True
+    return changed
@@ -0,0 +1,62 @@
+"""
+Shared fixtures for the Mergington High School API tests
+"""
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from src.app import app
+from tests._state import load_pristine, rollback
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Create a test client for the FastAPI app, shared across the session
+
+    The client is used as a context manager so startup and shutdown events
+    run exactly once.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def activities_json(client, track_activities):
+    """Fetch the initial GET /activities response once per session"""
+    response = client.get("/activities")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run async tests on asyncio"""
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def async_client(anyio_backend):
+    """Create an async client for the FastAPI app, shared across the session"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture(scope="session", autouse=True)
+def track_activities():
+    """Load initial activities once per session with tracked dicts and lists"""
+    load_pristine()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_activities(request, track_activities):
+    """Roll back changes made to activities after each test
+
+    Only the activity dicts and participant lists a test changed are restored.
+    The ``readonly`` marker no longer skips any work; it only checks that the
+    test did not change activities, and fails the test if it did.
+    """
+    yield
+    if rollback() and request.node.get_closest_marker("readonly"):
+        pytest.fail("readonly test changed activities")
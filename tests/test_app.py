@@ -4,92 +4,27 @@ Tests for the Mergington High School API
 Tests cover all endpoints including activity viewing, signup, and unregister functionality.
 """
 
+from urllib.parse import quote
+
+import anyio
 import pytest
-from fastapi.testclient import TestClient
-from src.app import app, activities
+from src.app import activities
+from tests._state import APP_SEED, PRISTINE, TrackedDict, TrackedList, rollback
 
 
-@pytest.fixture
-def client():
-    """Create a test client for the FastAPI app"""
-    return TestClient(app)
+# URL path segment for each activity name
+ACTIVITY_PATHS = {name: quote(name) for name in PRISTINE}
 
 
-@pytest.fixture(autouse=True)
-def reset_activities():
-    """Reset activities to initial state before each test"""
-    # Store original state
-    original_activities = {
-        "Chess Club": {
-            "description": "Learn strategies and compete in chess tournaments",
-            "schedule": "Fridays, 3:30 PM - 5:00 PM",
-            "max_participants": 12,
-            "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
-        },
-        "Programming Class": {
-            "description": "Learn programming fundamentals and build software projects",
-            "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
-            "max_participants": 20,
-            "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
-        },
-        "Gym Class": {
-            "description": "Physical education and sports activities",
-            "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
-            "max_participants": 30,
-            "participants": ["john@mergington.edu", "olivia@mergington.edu"]
-        },
-        "Soccer Team": {
-            "description": "Join the school soccer team and compete in inter-school matches",
-            "schedule": "Mondays and Wednesdays, 4:00 PM - 6:00 PM",
-            "max_participants": 25,
-            "participants": ["lucas@mergington.edu", "mia@mergington.edu"]
-        },
-        "Basketball Team": {
-            "description": "Practice basketball skills and participate in tournaments",
-            "schedule": "Tuesdays and Thursdays, 4:00 PM - 6:00 PM",
-            "max_participants": 15,
-            "participants": ["james@mergington.edu", "ava@mergington.edu"]
-        },
-        "Art Club 2": {
-            "description": "Explore various art mediums including painting, drawing, and sculpture",
-            "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
-            "max_participants": 18,
-            "participants": ["isabella@mergington.edu", "william@mergington.edu"]
-        },
-        "Drama Club": {
-            "description": "Participate in theater productions and develop acting skills",
-            "schedule": "Thursdays, 3:30 PM - 5:30 PM",
-            "max_participants": 22,
-            "participants": ["benjamin@mergington.edu", "charlotte@mergington.edu"]
-        },
-        "Science Club": {
-            "description": "Conduct experiments and explore scientific concepts",
-            "schedule": "Fridays, 3:00 PM - 4:30 PM",
-            "max_participants": 16,
-            "participants": ["ethan@mergington.edu", "amelia@mergington.edu"]
-        },
-        "Debate Team": {
-            "description": "Develop critical thinking and public speaking through competitive debates",
-            "schedule": "Tuesdays, 4:00 PM - 5:30 PM",
-            "max_participants": 14,
-            "participants": ["alexander@mergington.edu", "harper@mergington.edu"]
-        }
-    }
-    
-    # Reset activities
-    activities.clear()
-    activities.update(original_activities)
-    
-    yield
-    
-    # Clean up after test (reset again)
-    activities.clear()
-    activities.update(original_activities)
+def count(name):
+    """Return the number of participants in an activity"""
+    return len(activities[name]["participants"])
 
 
 class TestRootEndpoint:
     """Tests for the root endpoint"""
     
+    @pytest.mark.readonly
     def test_root_redirects_to_static(self, client):
         """Test that root endpoint redirects to static/index.html"""
         response = client.get("/", follow_redirects=False)
@@ -100,6 +35,7 @@ class TestRootEndpoint:
 class TestGetActivities:
     """Tests for GET /activities endpoint"""
     
+    @pytest.mark.readonly
     def test_get_activities_returns_all_activities(self, client):
         """Test that GET /activities returns all activities"""
         response = client.get("/activities")
@@ -109,19 +45,18 @@ class TestGetActivities:
         assert "Chess Club" in data
         assert "Programming Class" in data
     
-    def test_get_activities_structure(self, client):
+    @pytest.mark.readonly
+    @pytest.mark.parametrize("activity", list(ACTIVITY_PATHS))
+    def test_get_activities_structure(self, activities_json, activity):
         """Test that activities have correct structure"""
-        response = client.get("/activities")
-        data = response.json()
+        details = activities_json[activity]
         
-        # Check Chess Club structure
-        chess_club = data["Chess Club"]
-        assert "description" in chess_club
-        assert "schedule" in chess_club
-        assert "max_participants" in chess_club
-        assert "participants" in chess_club
-        assert isinstance(chess_club["participants"], list)
-        assert len(chess_club["participants"]) == 2
+        assert "description" in details
+        assert "schedule" in details
+        assert "max_participants" in details
+        assert "participants" in details
+        assert isinstance(details["participants"], list)
+        assert len(details["participants"]) == len(PRISTINE[activity]["participants"])
 
 
 class TestSignupForActivity:
@@ -129,7 +64,7 @@ class TestSignupForActivity:
     
     def test_signup_success(self, client):
         """Test successful signup for an activity"""
-        response = client.post("/activities/Chess%20Club/signup?email=test@mergington.edu")
+        response = client.post(f"/activities/{ACTIVITY_PATHS['Chess Club']}/signup?email=test@mergington.edu")
         assert response.status_code == 200
         data = response.json()
         assert "message" in data
@@ -137,40 +72,38 @@ class TestSignupForActivity:
         assert "Chess Club" in data["message"]
         
         # Verify participant was added
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert "test@mergington.edu" in activities_data["Chess Club"]["participants"]
-    
-    def test_signup_activity_not_found(self, client):
-        """Test signup for non-existent activity"""
-        response = client.post("/activities/Fake%20Club/signup?email=test@mergington.edu")
-        assert response.status_code == 404
-        data = response.json()
-        assert "detail" in data
-        assert "Activity not found" in data["detail"]
+        assert "test@mergington.edu" in activities["Chess Club"]["participants"]
     
     def test_signup_duplicate(self, client):
         """Test that signing up twice for same activity fails"""
         email = "michael@mergington.edu"
-        response = client.post(f"/activities/Chess%20Club/signup?email={email}")
+        response = client.post(f"/activities/{ACTIVITY_PATHS['Chess Club']}/signup?email={email}")
         assert response.status_code == 400
         data = response.json()
         assert "detail" in data
         assert "already signed up" in data["detail"]
     
-    def test_signup_multiple_students(self, client):
+    @pytest.mark.anyio
+    async def test_signup_multiple_students(self, async_client):
         """Test signing up multiple students for same activity"""
         students = ["student1@mergington.edu", "student2@mergington.edu", "student3@mergington.edu"]
         
-        for student in students:
-            response = client.post(f"/activities/Chess%20Club/signup?email={student}")
+        responses = []
+        
+        async def signup(student):
+            responses.append(await async_client.post(f"/activities/{ACTIVITY_PATHS['Chess Club']}/signup?email={student}"))
+        
+        async with anyio.create_task_group() as tg:
+            for student in students:
+                tg.start_soon(signup, student)
+        
+        assert len(responses) == len(students)
+        for response in responses:
             assert response.status_code == 200
         
         # Verify all students were added
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
         for student in students:
-            assert student in activities_data["Chess Club"]["participants"]
+            assert student in activities["Chess Club"]["participants"]
 
 
 class TestUnregisterFromActivity:
@@ -181,12 +114,10 @@ class TestUnregisterFromActivity:
         email = "michael@mergington.edu"
         
         # Verify participant exists
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data["Chess Club"]["participants"]
+        assert email in activities["Chess Club"]["participants"]
         
         # Unregister
-        response = client.delete(f"/activities/Chess%20Club/unregister?email={email}")
+        response = client.delete(f"/activities/{ACTIVITY_PATHS['Chess Club']}/unregister?email={email}")
         assert response.status_code == 200
         data = response.json()
         assert "message" in data
@@ -194,43 +125,49 @@ class TestUnregisterFromActivity:
         assert "Unregistered" in data["message"]
         
         # Verify participant was removed
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email not in activities_data["Chess Club"]["participants"]
-    
-    def test_unregister_activity_not_found(self, client):
-        """Test unregister from non-existent activity"""
-        response = client.delete("/activities/Fake%20Club/unregister?email=test@mergington.edu")
-        assert response.status_code == 404
-        data = response.json()
-        assert "detail" in data
-        assert "Activity not found" in data["detail"]
+        assert email not in activities["Chess Club"]["participants"]
     
     def test_unregister_not_registered(self, client):
         """Test unregistering a student who isn't registered"""
         email = "notregistered@mergington.edu"
-        response = client.delete(f"/activities/Chess%20Club/unregister?email={email}")
+        response = client.delete(f"/activities/{ACTIVITY_PATHS['Chess Club']}/unregister?email={email}")
         assert response.status_code == 400
         data = response.json()
         assert "detail" in data
         assert "not registered" in data["detail"]
     
-    def test_unregister_then_signup_again(self, client):
+    @pytest.mark.anyio
+    async def test_unregister_then_signup_again(self, async_client):
         """Test unregistering and then signing up again"""
         email = "michael@mergington.edu"
         
         # Unregister
-        response = client.delete(f"/activities/Chess%20Club/unregister?email={email}")
+        response = await async_client.delete(f"/activities/{ACTIVITY_PATHS['Chess Club']}/unregister?email={email}")
         assert response.status_code == 200
         
         # Sign up again
-        response = client.post(f"/activities/Chess%20Club/signup?email={email}")
+        response = await async_client.post(f"/activities/{ACTIVITY_PATHS['Chess Club']}/signup?email={email}")
         assert response.status_code == 200
         
         # Verify participant is back
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data["Chess Club"]["participants"]
+        assert email in activities["Chess Club"]["participants"]
+
+
+class TestActivityNotFound:
+    """Tests for signup and unregister requests to non-existent activities"""
+    
+    @pytest.mark.readonly
+    @pytest.mark.parametrize("method,path", [
+        ("post", "/activities/Fake%20Club/signup?email=test@mergington.edu"),
+        ("delete", "/activities/Fake%20Club/unregister?email=test@mergington.edu"),
+    ])
+    def test_activity_not_found(self, client, method, path):
+        """Test that signup and unregister reject unknown activities"""
+        response = getattr(client, method)(path)
+        assert response.status_code == 404
+        data = response.json()
+        assert "detail" in data
+        assert "Activity not found" in data["detail"]
 
 
 class TestActivityCapacity:
@@ -238,65 +175,81 @@ class TestActivityCapacity:
     
     def test_signup_increases_participant_count(self, client):
         """Test that signing up increases participant count"""
+        initial_count = count("Chess Club")
+        client.post(f"/activities/{ACTIVITY_PATHS['Chess Club']}/signup?email=newstudent@mergington.edu")
+        assert count("Chess Club") == initial_count + 1
+    
+    def test_unregister_decreases_participant_count(self, client):
+        """Test that unregistering decreases participant count"""
+        initial_count = count("Chess Club")
+        client.delete(f"/activities/{ACTIVITY_PATHS['Chess Club']}/unregister?email=michael@mergington.edu")
+        assert count("Chess Club") == initial_count - 1
+    
+    def test_participant_count_reported_by_api(self, client):
+        """Test that GET /activities reports the updated participant count"""
         # Get initial count
         initial_response = client.get("/activities")
-        initial_data = initial_response.json()
-        initial_count = len(initial_data["Chess Club"]["participants"])
+        initial_count = len(initial_response.json()["Chess Club"]["participants"])
         
         # Sign up new student
-        client.post("/activities/Chess%20Club/signup?email=newstudent@mergington.edu")
+        client.post(f"/activities/{ACTIVITY_PATHS['Chess Club']}/signup?email=newstudent@mergington.edu")
         
         # Get updated count
         updated_response = client.get("/activities")
-        updated_data = updated_response.json()
-        updated_count = len(updated_data["Chess Club"]["participants"])
+        updated_count = len(updated_response.json()["Chess Club"]["participants"])
         
         assert updated_count == initial_count + 1
+
+
+class TestActivitiesReset:
+    """Tests for the initial activities and rolling back changes between tests"""
     
-    def test_unregister_decreases_participant_count(self, client):
-        """Test that unregistering decreases participant count"""
-        # Get initial count
-        initial_response = client.get("/activities")
-        initial_data = initial_response.json()
-        initial_count = len(initial_data["Chess Club"]["participants"])
-        
-        # Unregister a student
-        client.delete("/activities/Chess%20Club/unregister?email=michael@mergington.edu")
-        
-        # Get updated count
-        updated_response = client.get("/activities")
-        updated_data = updated_response.json()
-        updated_count = len(updated_data["Chess Club"]["participants"])
+    def test_fixture_matches_app_seed(self):
+        """Test that the JSON fixture matches the app's seed data"""
+        assert APP_SEED == PRISTINE
+    
+    def test_rollback_restores_changed_fields(self):
+        """Test that rollback restores changed fields and replaced participant lists"""
+        installed = dict(activities)
+        activities["Chess Club"]["participants"] = ["replaced@mergington.edu"]
+        activities["Gym Class"]["max_participants"] = 0
+        del activities["Drama Club"]["schedule"]
         
-        assert updated_count == initial_count - 1
+        assert rollback() is True
+        assert activities == PRISTINE
+        for name, details in activities.items():
+            assert details is installed[name]
+            assert type(details) is TrackedDict
+            assert type(details["participants"]) is TrackedList
 
 
 class TestIntegrationScenarios:
     """Integration tests for complex scenarios"""
     
-    def test_complete_workflow(self, client):
+    @pytest.mark.anyio
+    async def test_complete_workflow(self, async_client):
         """Test a complete workflow: view activities, sign up, unregister"""
         email = "workflow@mergington.edu"
         activity = "Programming Class"
         
         # 1. View activities
-        response = client.get("/activities")
+        response = await async_client.get("/activities")
         assert response.status_code == 200
-        initial_participants = response.json()[activity]["participants"].copy()
+        initial_participants = response.json()[activity]["participants"]
         
         # 2. Sign up
-        response = client.post(f"/activities/{activity.replace(' ', '%20')}/signup?email={email}")
+        response = await async_client.post(f"/activities/{ACTIVITY_PATHS[activity]}/signup?email={email}")
         assert response.status_code == 200
         
         # Verify signup
-        response = client.get("/activities")
+        response = await async_client.get("/activities")
         assert email in response.json()[activity]["participants"]
         
         # 3. Unregister
-        response = client.delete(f"/activities/{activity.replace(' ', '%20')}/unregister?email={email}")
+        response = await async_client.delete(f"/activities/{ACTIVITY_PATHS[activity]}/unregister?email={email}")
         assert response.status_code == 200
         
         # Verify unregister
-        response = client.get("/activities")
+        response = await async_client.get("/activities")
         assert email not in response.json()[activity]["participants"]
         assert response.json()[activity]["participants"] == initial_participants
@@ -0,0 +1,32 @@
+"""
+Benchmarks for the Mergington High School API and test fixtures
+
+Excluded from the default run. Use ``pytest -m benchmark --codspeed`` to
+collect measurements.
+"""
+
+import pytest
+from src.app import activities
+from tests._state import rollback
+
+
+@pytest.mark.benchmark
+@pytest.mark.readonly
+def test_benchmark_get_activities(client):
+    """Benchmark serializing all activities through GET /activities"""
+    for _ in range(100):
+        response = client.get("/activities")
+        assert response.status_code == 200
+
+
+@pytest.mark.benchmark
+def test_benchmark_reset_activities(benchmark):
+    """Benchmark rolling back a signup the way reset_activities does"""
+    participants = activities["Chess Club"]["participants"]
+
+    def signup_and_rollback():
+        participants.append("benchmark@mergington.edu")
+        rollback()
+
+    benchmark(signup_and_rollback)
+    assert "benchmark@mergington.edu" not in participants